@@ -15,12 +15,15 @@
 #    You should have received a copy of the GNU General Public License
 
 import os
+import re
 import tempfile
 import datetime
 import time
 import shutil
+import subprocess
 import uuid
 import syslog
+import weakref
 import Utils as util
 import CryptoGen as cgen
 
@@ -31,6 +34,10 @@ gettext.bindtextdomain("inseca", lib_dir+"/locales")
 gettext.textdomain("inseca")
 _ = gettext.gettext
 
+# Borg's repository config file entries
+_max_segment_size_re=re.compile(r"^max_segment_size\s*=.*$", re.MULTILINE)
+_id_re=re.compile(r"^id\s*=.*$", re.MULTILINE)
+
 class BorgRepoIncomplete(Exception):
     pass
 class BorgMemoryError(Exception):
@@ -40,50 +47,108 @@ class BorgRepoLocked(Exception):
 class BorgPermissionDenied(Exception):
     pass
 
+# known Borg errors: (string to look for in Borg's stderr, exception to raise, error message)
+_borg_errors=(
+    ("Data integrity error", BorgRepoIncomplete, _("Incomplete synchronisation, retry later")),
+    ("MemoryError", BorgMemoryError, _("Not enough memory(?)")),
+    ("Failed to create/acquire the lock", BorgRepoLocked, _("Unable to acquire lock on repository, may already be used")),
+)
+
+_tmp_dirs=weakref.WeakValueDictionary() # key=real path of a repository, value=TemporaryDirectory object shared by the
+                                        # Repo objects of that repository (removed when none of them uses it anymore)
+_borg_versions={} # key=borg program path, value=version as an int (e.g. 12 for 1.2.x)
+_missing_archive_ttl=10 # number of seconds during which an archive found to be missing is not looked for again
+
+def _get_borg_version(borg_prog):
+    """Get the version of the specified Borg program, as an int (e.g. 12 for 1.2.x).
+    Borg is only executed the first time a specific program is queried"""
+    if borg_prog not in _borg_versions:
+        (status, out, err)=util.exec_sync([borg_prog, "-V"])
+        if status!=0:
+            raise Exception(f"Could not determine borg's version: {err}")
+        (_, version_s)=out.split()
+        (maj, min, *_)=version_s.split(".")
+        _borg_versions[borg_prog]=int(maj)*10+int(min)
+    return _borg_versions[borg_prog]
+
+def _archive_spec(archive_name):
+    """Get the Borg argument designating an archive of the repository defined by the BORG_REPO environment variable"""
+    return f"::{archive_name}"
+
+def _umount_all(borg_prog, exec_env, mountpoints):
+    """Unmounts all the archives still in @mountpoints (as managed by a Repo object), called when
+    the Repo object is garbage collected or when Python exits. Does not reference the Repo object itself
+    so it does not prevent it from being garbage collected"""
+    for (mp, proc) in mountpoints.values():
+        proc.terminate()
+    for (mp, proc) in mountpoints.values():
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        util.exec_sync([borg_prog, "umount", mp], exec_env=exec_env)
+        try:
+            os.rmdir(mp)
+        except Exception:
+            pass
+    mountpoints.clear()
+
 class Repo:
     def __init__(self, repo_dir, password, config_dir=None, cache_dir=None):
         self._repo_dir=repo_dir
         self._password=password
+        self._tmp_dir=None
+        if config_dir is None or cache_dir is None:
+            # the temporary directory is shared by the Repo objects of the same repository existing at the same time
+            # so Borg's cache does not need to be rebuilt for each of them, it is removed when the last of them
+            # is garbage collected
+            key=os.path.realpath(repo_dir)
+            tmp_dir=_tmp_dirs.get(key)
+            if tmp_dir is None:
+                tmp_dir=tempfile.TemporaryDirectory()
+                os.makedirs(tmp_dir.name+"/config")
+                os.makedirs(tmp_dir.name+"/cache")
+                _tmp_dirs[key]=tmp_dir
+            self._tmp_dir=tmp_dir
+            if config_dir is None:
+                config_dir=self._tmp_dir.name+"/config"
+            if cache_dir is None:
+                cache_dir=self._tmp_dir.name+"/cache"
         self._config_dir=config_dir
         self._cache_dir=cache_dir
-        self._tmp_dir=None
         self._mountpoints={} # key=archive name, value=[tmp directory name (as a string) where it is mounted, Popen object]
-        self._borg_prog=shutil.which("borg") # so Python does not have to search the borg exe while shuting down (in the __del__ method)
+        self._missing_archives={} # key=archive name, value=time.monotonic() when the archive was found to be missing
+        self._borg_prog=shutil.which("borg") # so Python does not have to search the borg exe while shuting down (in the finalizer)
         if self._borg_prog is None:
             raise Exception("Could not find the 'borg' program, make sure Borg Backup is installed")
 
-        # determine Borg version
-        (status, out, err)=util.exec_sync([self._borg_prog, "-V"])
-        if status!=0:
-            raise Exception(f"Could not determine borg's version: {err}")
-        (_, version_s)=out.split()
-        (maj, min, *_)=version_s.split(".")
-        version=int(maj)*10+int(min)
-
         # determine available features
+        version=_get_borg_version(self._borg_prog)
         self._has_compact=version>=12
+        self._has_list_format=version>=11
+
+        # make sure no archive remains mounted
+        self._finalizer=weakref.finalize(self, _umount_all, self._borg_prog, self.get_exec_env(), self._mountpoints)
+
+    def __enter__(self):
+        return self
 
-    def __del__(self):
+    def __exit__(self, exc_type, exc_value, traceback):
         self.umount_all()
 
     @property
     def config_dir(self):
-        if self._config_dir is None:
-            if self._tmp_dir is None:
-                self._tmp_dir=tempfile.TemporaryDirectory()
-            self._config_dir=self._tmp_dir.name+"/config"
-            os.makedirs(self._config_dir)
         return self._config_dir
 
     @property
     def cache_dir(self):
-        if self._cache_dir is None:
-            if self._tmp_dir is None:
-                self._tmp_dir=tempfile.TemporaryDirectory()
-            self._cache_dir=self._tmp_dir.name+"/cache"
-            os.makedirs(self._cache_dir)
         return self._cache_dir
 
+    @property
+    def mounted_archives(self):
+        """List of the names of the archives currently mounted"""
+        return list(self._mountpoints.keys())
+
     def get_exec_env(self):
         cenv=os.environ.copy()
         cenv["BORG_PASSPHRASE"]=self._password
@@ -105,13 +170,10 @@ class Repo:
         return cenv
 
     def _borg_err_to_exception(self, context, err):
-        if "Data integrity error" in err:
-            raise BorgRepoIncomplete("%s: %s"%(context, _("Incomplete synchronisation, retry later")))
-        elif "MemoryError" in err:
-            raise BorgMemoryError("%s: %s"%(context, _("Not enough memory(?)")))
-        elif "Failed to create/acquire the lock" in err:
-            raise BorgRepoLocked(f"{context}: {_('Unable to acquire lock on repository, may already be used')}")
-        elif "PermissionError" in err:
+        for (pattern, exc_class, message) in _borg_errors:
+            if pattern in err:
+                raise exc_class(f"{context}: {message}")
+        if "PermissionError" in err:
             for line in err.splitlines():
                 if line.startswith("PermissionError"):
                     raise BorgPermissionDenied(line)
@@ -128,6 +190,26 @@ class Repo:
             self._borg_err_to_exception(context, err)
         return out
 
+    def _borg_run_iter(self, args:list[str], context:str):
+        """Execute Borg, handle errors and yield each line of the execution's output as soon as it is produced,
+        without buffering the whole output"""
+        with tempfile.TemporaryFile() as errfile:
+            proc=subprocess.Popen([self._borg_prog]+args, stdout=subprocess.PIPE, stderr=errfile,
+                                  env=self.get_exec_env(), encoding="utf-8")
+            try:
+                for line in proc.stdout:
+                    yield line.rstrip("\r\n")
+                status=proc.wait()
+            finally:
+                if proc.returncode is None:
+                    # the caller stopped iterating before the end of the output
+                    proc.terminate()
+                    proc.wait()
+                proc.stdout.close()
+            if status!=0:
+                errfile.seek(0)
+                self._borg_err_to_exception(context, errfile.read().decode().rstrip("\r\n"))
+
     def init(self):
         """Initialize a Borg repository.
         If no password was specified when the object was created, one is randomly generated.
@@ -140,13 +222,10 @@ class Repo:
                        _("Could not initialize repository"))
 
         # change segment size to 32Mb
-        newconf=[]
         cfile="%s/config"%self._repo_dir
-        for line in util.load_file_contents(cfile).splitlines():
-            if line.startswith("max_segment_size"):
-                line="max_segment_size = 33554432"
-            newconf+=[line]
-        util.write_data_to_file("\n".join(newconf), cfile)
+        data=util.load_file_contents(cfile)
+        data=_max_segment_size_re.sub("max_segment_size = 33554432", data, count=1)
+        util.write_data_to_file(data, cfile)
 
         return self._password
 
@@ -160,18 +239,10 @@ class Repo:
         """Generate a new ID and define it as the new ID of the repository"""
         id=cgen.generate_password(64, "abcdef0123456789")
         configfile=f"{self._repo_dir}/config"
-        nlines=[]
-        with open(configfile, "r") as fd:
-            replaced=False
-            for line in fd.read().splitlines():
-                if line.startswith("id ="):
-                    nlines.append(f"id = {id}")
-                    replaced=True
-                else:
-                    nlines.append(line)
-            if not replaced:
-                raise Exception(f"Could not identify the repository's ID in '{configfile}', Borg's file format changed?")
-        util.write_data_to_file("\n".join(nlines), configfile)
+        (data, replaced)=_id_re.subn(f"id = {id}", util.load_file_contents(configfile), count=1)
+        if replaced==0:
+            raise Exception(f"Could not identify the repository's ID in '{configfile}', Borg's file format changed?")
+        util.write_data_to_file(data, configfile)
 
     def create_archive(self, datadir, compress=False):
         """Create a new archive containing the data in @datadir.
@@ -179,8 +250,9 @@ class Repo:
         # create archive
         arname=str(uuid.uuid4())
         util.print_event(_("Creating archive '%s'")%arname)
-        self._borg_run(["create", "-C", "lzma,9" if compress else "none", "::%s"%arname, "."],
-                        _("Could not create archive"), stdin_data="Y", cwd=datadir)
+        self._borg_run(["create", "-C", "lzma,9" if compress else "none", _archive_spec(arname), "."],
+                        _("Could not create archive"), cwd=datadir)
+        self._missing_archives.clear()
 
         # change ownership of the files if program was executed using sudo
         if "SUDO_UID" in os.environ and "SUDO_GID" in os.environ:
@@ -195,11 +267,17 @@ class Repo:
     def get_all_archives(self):
         """Get a list of all the archives as a dictionary indexed by the timestamp the archive was created
         and where values are the associated archives' name"""
-        # the "Y" is necessary so that repos. can be relocated
-        out=self._borg_run(["list"], _("Failed to get archives list"), stdin_data="Y")
         res={}
-        
-        for line in out.splitlines():
+        if self._has_list_format:
+            # have Borg directly output the archives' timestamp
+            for line in self._borg_run_iter(["list", "--format", "{time:%s}{TAB}{archive}{NL}"],
+                                            _("Failed to get archives list")):
+                # e.g. 1586854114	b7760356-7e2c-11ea-be7b-5703d69f8bcb
+                (ts, name)=line.split("\t", 1)
+                res[int(ts)]=name
+            return res
+
+        for line in self._borg_run_iter(["list"], _("Failed to get archives list")):
             # e.g. b7760356-7e2c-11ea-be7b-5703d69f8bcb Tue, 2020-04-14 10:48:34
             parts=line.split()
             if len(parts)<4:
@@ -250,9 +328,7 @@ class Repo:
         try:
             arlist=self.get_all_archives()
             if len(arlist)>0:
-                tslist=list(arlist.keys())
-                tslist.sort(reverse=True)
-                ts=tslist[0]
+                ts=max(arlist)
                 return (ts, arlist[ts])
             else:
                 return (0, None)
@@ -263,10 +339,14 @@ class Repo:
         """Tells if a specific archive is in the repository"""
         if archive_name in self._mountpoints:
             return True
-        out=self._borg_run(["list"], _("Could not list archives"))
-        for line in out.splitlines():
+        missing_ts=self._missing_archives.get(archive_name)
+        if missing_ts is not None and time.monotonic()-missing_ts<_missing_archive_ttl:
+            return False
+        for line in self._borg_run_iter(["list"], _("Could not list archives")):
             if line.startswith("%s "%archive_name):
+                self._missing_archives.pop(archive_name, None)
                 return True
+        self._missing_archives[archive_name]=time.monotonic()
         return False
 
     def extract_archive(self, archive_name, destdir, files=None):
@@ -277,27 +357,23 @@ class Repo:
             raise Exception(_("Destination path '%s' does not exist")%destdir)
         if not os.path.isdir(destdir):
             raise Exception(_("Destination path '%s' is not a directory")%destdir)
-        cwd=os.getcwd()
-        try:
-            os.chdir(destdir)
-            #util.print_event("Extracting archive %s in %s"%(archive_name, destdir))
-            if files is None:
-                self._borg_run(["extract", "--sparse", "::%s"%archive_name], _("Could not extract archive"))
-            elif isinstance (files, list):
-                self._borg_run(["extract", "--sparse", "::%s"%archive_name]+files, _("Could not extract files %s from archive")%files)
-            else:
-                raise Exception(f"Invalid @files argument, expected a list, got a {type(files)}")
-        finally:
-            os.chdir(cwd)
+        #util.print_event("Extracting archive %s in %s"%(archive_name, destdir))
+        args=["extract", "--sparse", _archive_spec(archive_name)]
+        if files is None:
+            self._borg_run(args, _("Could not extract archive"), cwd=destdir)
+        elif isinstance (files, list):
+            self._borg_run(args+files, _("Could not extract files %s from archive")%files, cwd=destdir)
+        else:
+            raise Exception(f"Invalid @files argument, expected a list, got a {type(files)}")
 
     def list_archive_contents(self, arname):
         """List all the files in the archive
         Returns: the raw textual output"""
-        return self._borg_run(["list", "::%s"%arname], _("Could not list files in archive"))
+        return self._borg_run(["list", _archive_spec(arname)], _("Could not list files in archive"))
 
     def delete_archive(self, arname):
         """Delete the specified archive from the reposiroty"""
-        self._borg_run(["delete", "::%s"%arname], _("Could not delete archive"), stdin_data="Y")
+        self._borg_run(["delete", _archive_spec(arname)], _("Could not delete archive"))
 
     def vacuum(self):
         """Remove unused data from the repository"""
@@ -312,24 +388,33 @@ class Repo:
             return self._mountpoints[archive_name][0]
         mp=tempfile.mkdtemp()
 
-        # the -f argument requests that the process don't daemonize itself
-        proc=util.exec_async([self._borg_prog, "mount", "-f", "::%s"%archive_name, mp], exec_env=self.get_exec_env())
-        time.sleep(0.5)
-        ret=proc.poll()
-        if ret is not None:
-            (out, err)=proc.communicate()
-            self._borg_err_to_exception(_("Could not mount archive '%s'"%archive_name), err)
+        # the -f argument requests that the process don't daemonize itself; its stderr goes to a temporary file
+        # (rather than a pipe which nobody would read once mounted) to report the error if it fails
+        with tempfile.TemporaryFile() as errfile:
+            proc=subprocess.Popen([self._borg_prog, "mount", "-f", _archive_spec(archive_name), mp],
+                                  stderr=errfile, env=self.get_exec_env())
+
+            # wait until either the FUSE process fails or the archive is actually useable, with an
+            # exponential backoff (inotify can't be used here as mounting does not generate any event on @mp)
+            delay=0.01
+            deadline=time.monotonic()+3.5
+            while True:
+                ret=proc.poll()
+                if ret is not None:
+                    try:
+                        os.rmdir(mp)
+                    except Exception:
+                        pass
+                    errfile.seek(0)
+                    self._borg_err_to_exception(_("Could not mount archive '%s'"%archive_name),
+                                                errfile.read().decode().rstrip("\r\n"))
+                if len(os.listdir(mp))>0 or time.monotonic()>deadline:
+                    break
+                time.sleep(delay)
+                delay=min(delay*2, 0.5)
 
         self._mountpoints[archive_name]=[mp, proc]
         util.print_event(_(f"Mounted archive '{archive_name}' on '{mp}'"))
-
-        # ensure that the archive is actually useable before returning
-        counter=0
-        while counter<6:
-            counter+=1
-            if len(os.listdir(mp))>0:
-                break
-            time.sleep(0.5)
         return mp
 
     def umount(self, archive_name):
@@ -337,12 +422,6 @@ class Repo:
         if archive_name not in self._mountpoints:
             return
 
-        try:
-            _
-        except Exception:
-            # python may be shutting down
-            _ = lambda x:x
-
         (mp, proc)=self._mountpoints[archive_name]
         # kill the FUSE process
         proc.terminate()
@@ -364,12 +443,12 @@ class Repo:
             os.rmdir(mp)
         except Exception:
             pass
-        try:
-            util.print_event(_(f"Unmounted archive '{archive_name}' (was mounted on '{mp}')")) # may fail if Python is shuting down
-        except:
-            pass
+        util.print_event(_(f"Unmounted archive '{archive_name}' (was mounted on '{mp}')"))
 
     def umount_all(self):
         """Unmounts all the mounted archives"""
+        # terminate all the FUSE processes first so they all shut down concurrently
+        for (mp, proc) in self._mountpoints.values():
+            proc.terminate()
         for archive_name in list(self._mountpoints.keys()):
             self.umount(archive_name)
@@ -17,25 +17,33 @@
 
 from __future__ import annotations
 import os
+import stat
 import json
 import enum
 import datetime
 import calendar
+import copy
+import operator
 import shutil
 import sys
 import uuid
 import tempfile
 import tarfile
+import threading
+import concurrent.futures
 from dataclasses import dataclass
+from collections import namedtuple
+try:
+    import orjson
+except ImportError:
+    orjson=None # fall back to the json module
 import CryptoGen as cgen
 import CryptoX509 as x509
 from abc import ABC, abstractmethod, abstractproperty
 import Utils as util
 import Filesystem
 import Sync
-import Borg as borg
 import ValueHolder
-import LiveBuilder
 
 # Gettext stuff
 import gettext
@@ -44,49 +52,157 @@ gettext.bindtextdomain("inseca", lib_dir+"/locales")
 gettext.textdomain("inseca")
 _ = gettext.gettext
 
+# constant directories, computed once
+_script_dir=os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+_resources_dir=f"{lib_dir}/../tools/resources"
+
 # file names
 file_iso="live-linux.iso"
 file_userdata="live-linux.userdata-specs"
 file_infos="infos.json"
 
+def _load_json(filename):
+    """Load and parse a JSON file, using the faster orjson module if it is available"""
+    if orjson is not None:
+        with open(filename, "rb") as fd:
+            return orjson.loads(fd.read())
+    with open(filename, "r") as fd:
+        return json.load(fd)
+
+# specification of an attribute in a configuration file
+_AttrSpec=namedtuple("_AttrSpec", ("type", "nullable", "required"))
+
+def _list_config_entries(path):
+    """List the entries of a configurations directory (as os.DirEntry objects, which cache the entry's type),
+    ignoring the ones with a name starting with '_'"""
+    with os.scandir(path) as entries:
+        return [entry for entry in entries if entry.name[0]!="_"]
+
 def _validate_attributes(data, specs):
     """Check that @data respects the specifications
-    @specs is a list of [attr name, can be None, is required]
+    @specs is a dictionary indexed by attribute name, of _AttrSpec values
     """
-    if not isinstance(data, dict):
+    if type(data) is not dict and not isinstance(data, dict):
         raise Exception("CODEBUG: expected a dictionary, got: %s"%data)
     if len(data)>len(specs):
         raise Exception("CODEBUG: extra attributes: spec=%s / data=%s"%(specs, data))
-    for attr in specs:
-        spec=specs[attr]
+    for attr, (stype, nullable, required) in specs.items():
         if attr not in data:
-            if spec[2]:
+            if required:
                 raise Exception(_("Missing attribute '%s'")%attr)
         else:
             value=data[attr]
-            if value is None and not spec[1]:
-                raise Exception(_("Invalid attribute '%s': should not be null")%attr)
-            if value is not None and not isinstance(value, spec[0]):
+            if value is None:
+                if not nullable:
+                    raise Exception(_("Invalid attribute '%s': should not be null")%attr)
+            elif not isinstance(value, stype):
                 raise Exception(_("Invalid attribute '%s': wrong data type")%attr)
 
+# configuration files' attributes specifications
+_global_settings_specs={
+    "deploy": _AttrSpec(dict, False, True),
+    "is-master": _AttrSpec(bool, False, False)
+}
+_build_conf_specs={
+    "id": _AttrSpec(str, False, True),
+    "descr": _AttrSpec(str, False, True),
+    "l10n": _AttrSpec(dict, True, False),
+    "version": _AttrSpec(str, False, True),
+    "build-dir": _AttrSpec(str, False, True),
+    "repo": _AttrSpec(str, True, True),
+    "privdata-ekey-pub-file": _AttrSpec(str, True, True),
+    "privdata-ekey-priv-file": _AttrSpec(str, True, True),
+    "components": _AttrSpec(dict, False, True),
+    "validity-months": _AttrSpec(int, False, True)
+}
+_l10n_specs={
+    "timezone": _AttrSpec(str, False, True),
+    "locale": _AttrSpec(str, False, True),
+    "keyboard-layout": _AttrSpec(str, True, False),
+    "keyboard-model": _AttrSpec(str, True, False),
+    "keyboard-variant": _AttrSpec(str, True, False),
+    "keyboard-option": _AttrSpec(str, True, False)
+}
+_install_conf_specs={
+    "id": _AttrSpec(str, False, True),
+    "descr": _AttrSpec(str, False, True),
+    "build-repo": _AttrSpec(str, False, True),
+    "repo": _AttrSpec(str, True, True),
+    "parameters": _AttrSpec(dict, True, True),
+    "dev-format": _AttrSpec(dict, False, True),
+    "devicemeta-skey-priv-file": _AttrSpec(str, False, True),
+    "devicemeta-skey-pub-file": _AttrSpec(str, False, True),
+    "build-skey-pub-file": _AttrSpec(str, True, True),
+    "password-rescue": _AttrSpec(str, False, True),
+    "install": _AttrSpec(dict, False, True),
+    "userdata": _AttrSpec(dict, False, False)
+}
+_format_conf_specs={
+    "id": _AttrSpec(str, False, True),
+    "descr": _AttrSpec(str, False, True),
+    "repo": _AttrSpec(str, True, True),
+    "parameters": _AttrSpec(dict, True, True),
+    "dev-format": _AttrSpec(dict, False, True),
+    "devicemeta-skey-priv-file": _AttrSpec(str, False, True),
+    "devicemeta-skey-pub-file": _AttrSpec(str, False, True),
+    "password-rescue": _AttrSpec(str, False, True)
+}
+_domain_conf_specs={
+    "id": _AttrSpec(str, False, True),
+    "descr": _AttrSpec(str, False, True),
+    "repo": _AttrSpec(str, True, True),
+    "install": _AttrSpec(list, False, True),
+    "format": _AttrSpec(list, False, True)
+}
+_repo_conf_specs={
+    "id": _AttrSpec(str, False, True),
+    "type": _AttrSpec(str, False, True),
+    "descr": _AttrSpec(str, True, True),
+    "path": _AttrSpec(str, False, True),
+    "password": _AttrSpec(str, False, True),
+    "compress": _AttrSpec(bool, True, True)
+}
+
+# parameters definitions
+_parameter_attributes=frozenset(("descr", "type", "default", "attest"))
+_parameter_required_attributes=("descr", "type", "attest")
+_parameter_types=frozenset(("str", "filesystem", "password", "timestamp", "int", "file", "size-mb", "encryptiontype"))
+
 def _validate_parameter_definition(data): # FIXME: put someplace where it can also be used by the SpecBuilder
     if not isinstance(data, dict):
         raise Exception(_("Expected a dictionary, got: %s")%data)
-    attrs=("descr", "type", "default", "attest")
-    for attr in data:
-        if attr not in attrs:
-            raise Exception(_("Invalid attribute '%s'")%attr)
-    for attr in ("descr", "type", "attest"):
+    if not data.keys()<=_parameter_attributes:
+        for attr in data:
+            if attr not in _parameter_attributes:
+                raise Exception(_("Invalid attribute '%s'")%attr)
+    for attr in _parameter_required_attributes:
         if attr not in data:
             raise Exception(_("Missing attribute '%s'")%attr)
 
     if not isinstance(data["descr"], str):
         raise Exception(_("Invalid 'descr' attribute: wrong type"))
-    if data["type"] not in ("str", "filesystem", "password", "timestamp", "int", "file", "size-mb", "encryptiontype"):
+    if data["type"] not in _parameter_types:
         raise Exception(_("Invalid 'type' attribute '%s'")%data["type"])
     if not isinstance(data["attest"], bool):
         raise Exception(_("Invalid 'attest' attribute: wrong type"))
 
+def _merge_parameters(params_core, params_config):
+    """Combine the core configuration's parameters with the ones of a configuration, which can't redefine
+    any core parameter"""
+    for param in params_config:
+        if param in params_core:
+            raise Exception(_("Invalid parameter '%s': already part of core configuration")%param)
+    return {**params_core, **params_config}
+
+def _merge_dev_format(dev_fmt, conf_dev_format):
+    """Merge the 'dev-format' part of a configuration into the core configuration's one (@dev_fmt, which is modified)"""
+    for section in ("unprotected", "protected", "decryptors", "signatures"):
+        if section in conf_dev_format:
+            for entry in conf_dev_format[section]:
+                if entry in dev_fmt[section]:
+                    raise Exception(_(f"Invalid configuration entry '{entry}' in section '{section}': already part of core configuration"))
+                dev_fmt[section][entry]=conf_dev_format[section][entry]
+
 def validate_parameter_value(spec, value, config_dir):
     rtype=spec["type"]
     if rtype=="str":
@@ -109,26 +225,72 @@ def validate_parameter_value(spec, value, config_dir):
             raise Exception(_("Wrong value '%s' for a filesystem parameter")%value)
 
 def get_last_file_modification_ts(basename, exclude=None):
-    rts=int(os.stat(basename).st_mtime)
-    if os.path.isdir(basename):
-        for fname in os.listdir(basename):
-            if fname==".git":
-                continue
-            path="%s/%s"%(basename, fname)
-            if path==exclude:
-                continue
-            if os.path.isdir(path):
-                ts=get_last_file_modification_ts(path)
-            else:
-                try:
-                    ts=int(os.stat(path).st_mtime)
-                except Exception:
-                    # file can't be read, or a symlink to some unavailable place
-                    ts=0
-            if rts<ts:
-                rts=ts
+    st=os.stat(basename)
+    rts=int(st.st_mtime)
+    if not stat.S_ISDIR(st.st_mode):
+        return rts
+
+    # walk the sub directories using an explicit stack rather than recursively, each directory
+    # being visited only once even if some symlinks create loops
+    visited={(st.st_dev, st.st_ino)}
+    stack=[basename]
+    while stack:
+        dirname=stack.pop()
+        # NB: os.scandir() provides the file type without any extra stat() call
+        with os.scandir(dirname) as entries:
+            for entry in entries:
+                if entry.name==".git":
+                    continue
+                if entry.path==exclude:
+                    continue
+                if entry.is_dir():
+                    st=os.stat(entry.path)
+                    key=(st.st_dev, st.st_ino)
+                    if key in visited:
+                        continue
+                    visited.add(key)
+                    stack.append(entry.path)
+                    ts=int(st.st_mtime)
+                else:
+                    try:
+                        ts=int(entry.stat().st_mtime)
+                    except Exception:
+                        # file can't be read, or a symlink to some unavailable place
+                        ts=0
+                if rts<ts:
+                    rts=ts
+        exclude=None # only applies to @basename's direct entries
     return rts
 
+_component_confs={} # key=path of a component's config.json file, value=(modification time, parsed contents)
+
+def _load_component_conf(cfile, missing_ok=False):
+    """Load a component's config.json file, it is only parsed again if it has been modified since the last call.
+    If @missing_ok is True, then None is returned if the file can't be accessed (i.e. when os.path.exists()
+    would return False) instead of raising an exception.
+    NB: the returned data is shared and must not be modified"""
+    try:
+        mtime=os.stat(cfile).st_mtime_ns
+    except (OSError, ValueError):
+        if missing_ok:
+            return None
+        raise
+    cached=_component_confs.get(cfile)
+    if cached is not None and cached[0]==mtime:
+        return cached[1]
+    cdata=_load_json(cfile)
+    _component_confs[cfile]=(mtime, cdata)
+    return cdata
+
+_core_confs={} # key=core configuration file name, value=parsed contents
+
+def _load_core_conf(fname):
+    """Load one of the core-*-config.json files of this directory, which are only parsed once.
+    Returns a copy of the data, which can be modified by the caller"""
+    if fname not in _core_confs:
+        _core_confs[fname]=_load_json(f"{lib_dir}/{fname}")
+    return copy.deepcopy(_core_confs[fname])
+
 def identify_free_filename(base_dir, prefix, ext=None):
     """Identify a 'free' (inexistant) directory/file name like $base_dir/$prefix.<index>.
     Returns the full path"""
@@ -151,6 +313,8 @@ class BuildType(str, enum.Enum):
     WKS="workstation"
     SERVER="server"
 
+_merge_probe_max=32 # below that number of updated entries, merge_update() checks each of them instead of listing the whole directory
+
 class GlobalConfiguration:
     """Represents a global INSECA configuration.
     Creating a new object allows one to take into account an updated configuration"""
@@ -163,7 +327,8 @@ class GlobalConfiguration:
             if not os.path.isdir(path):
                 raise Exception(_("Directory '%s' pointed by INSECA_ROOT environment variable does not exist")%path)
         self._path=os.path.realpath(path)
-        self._script_dir=os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+        self._path_prefix=self._path+"/"
+        self._script_dir=_script_dir
 
         # Check that the top level directories are present
         for fname in ("install-configurations", "format-configurations", "repo-configurations", "domain-configurations"):
@@ -174,25 +339,36 @@ class GlobalConfiguration:
                 raise Exception(_(f"'{fpath}' should be a directory"))
 
         self._load_global_settings()
-        self._all_conf_ids=[] # to avoid ANY config ID duplicate
+        self._all_conf_ids=set() # to avoid ANY config ID duplicate
         self._load_build_configs()
         self._load_install_configs()
         self._load_format_configs()
         self._load_domain_configs()
         self._load_repo_configs()
 
+        # configuration IDs returned by the *_configs properties, computed once as the configurations
+        # are not modified after having been loaded
+        self._build_config_ids=tuple(self._build_configs)
+        self._install_config_ids=tuple(self._install_configs)
+        self._format_config_ids=tuple(self._format_configs)
+        self._domain_config_ids=tuple(self._domain_configs)
+        self._repo_config_ids=tuple(self._repo_configs)
+
         # identify the build ID associated to install configs
         # NB: on admin environments, there is no build config => this step will actually not provide
         #     the build_id
-        for iuid in self._install_configs:
-            iconf=self._install_configs[iuid]
-            for uid in self._build_configs:
-                bconf=self._build_configs[uid]
-                if bconf.repo_id==iconf._build_repo_id:
-                    iconf.build_id=uid
-                    break
+        build_ids={} # key=build repo ID, value=ID of the first build config using it
+        for uid, bconf in self._build_configs.items():
+            build_ids.setdefault(bconf.repo_id, uid)
+        for iconf in self._install_configs.values():
+            uid=build_ids.get(iconf._build_repo_id)
+            if uid is not None:
+                iconf.build_id=uid
 
         self._archives_cache_dir=None # must be defined before use, no default value
+        self._install_elements_archives={} # key=install config ID, value=latest build archive used by get_install_elements()
+        self._build_infos={} # key=(build repo ID, archive name), value=parsed contents of the archive's infos file
+        self._referencing_configs=None # key=config ID, value=list of the configurations referencing it
         if not self._is_master:
             if "INSECA_CACHE_DIR" in os.environ:
                 self.archives_cache_dir=os.environ["INSECA_CACHE_DIR"]
@@ -217,8 +393,8 @@ class GlobalConfiguration:
         """Get the part of @path relative to the directory holding the INSECA configuration,
         Returns @path itself if it's not a subdir of that directory
         """
-        if path.startswith(self._path):
-            return path[len(self._path)+1:]
+        if path.startswith(self._path_prefix):
+            return path[len(self._path_prefix):]
         return path
 
     @property
@@ -236,84 +412,73 @@ class GlobalConfiguration:
     @archives_cache_dir.setter
     def archives_cache_dir(self, archive_dir):
         archive_dir=os.path.realpath(archive_dir)
-        os.makedirs(archive_dir, mode=0o700, exist_ok=True)
-        if os.stat(archive_dir).st_mode&0o777!=0o700: # ensure the dir's mode is 700
-            os.chmod(archive_dir, 0o700)
+        try:
+            os.makedirs(archive_dir, mode=0o700)
+        except FileExistsError:
+            st=os.stat(archive_dir)
+            if not stat.S_ISDIR(st.st_mode):
+                raise
+            if st.st_mode&0o777!=0o700: # ensure the dir's mode is 700
+                os.chmod(archive_dir, 0o700)
         self._archives_cache_dir=archive_dir
+        self._archives_cache_dir_in_path=archive_dir.startswith(self._path_prefix)
 
     @property
     def build_configs(self):
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
-        return list(self._build_configs.keys())
+        return self._build_config_ids
 
     @property
     def install_configs(self):
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
-        return list(self._install_configs.keys())
+        return self._install_config_ids
 
     @property
     def format_configs(self):
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
-        return list(self._format_configs.keys())
+        return self._format_config_ids
 
     @property
     def domain_configs(self):
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
-        return list(self._domain_configs.keys())
+        return self._domain_config_ids
 
     @property
     def repo_configs(self):
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
-        return list(self._repo_configs.keys())
+        return self._repo_config_ids
 
     @property
     def proxy_pac_file(self):
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
         return self._proxy_pac_file
 
     @property
     def is_master(self):
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
         return self._is_master
 
     def _load_global_settings(self):
         fname="%s/inseca.json"%self._path
-        if not os.path.isfile(fname):
+        try:
+            data=_load_json(fname)
+        except FileNotFoundError:
             raise Exception(_("Global configuration file '%s' is missing")%fname)
-        data=json.load(open(fname, "r"))
 
         # global validation
-        specs={
-            "deploy": [dict, False, True],
-            "is-master": [bool, False, False]
-        }
-        _validate_attributes(data, specs)
-        self._sync_configs={}
-
-        # deploy configuration
-        for entry in data["deploy"]:
-            sdata=data["deploy"][entry]
-            if "reader-conf" in sdata:
-                fname=None
-                if sdata["reader-conf"] is not None:
-                    fname="%s/storage-credentials/%s"%(self._path, sdata["reader-conf"])
-                    if not os.path.isfile(fname):
-                        raise Exception(_(f"'reader-conf' file '{fname}' not found for entry '{entry}'"))
-                self._sync_configs["R"+entry]=Sync.SyncConfig(entry, sdata["root"], fname)
-            if "writer-conf" in sdata:
-                fname=None
-                if sdata["writer-conf"] is not None:
-                    fname="%s/storage-credentials/%s"%(self._path, sdata["writer-conf"])
-                    if not os.path.isfile(fname):
-                        raise Exception(_(f"'writer-conf' file '{fname}' not found for entry '{entry}'"))
-                self._sync_configs["W"+entry]=Sync.SyncConfig(entry, sdata["root"], fname)
+        _validate_attributes(data, _global_settings_specs)
+
+        # deploy configuration, the sync. objects are only created when first needed
+        self._deploy=data["deploy"]
+        self._sync_configs=None
+        self._sync_objects=None # key=way out (boolean), value=list of the corresponding sync. objects
 
         # proxy.pac
         self._proxy_pac_file=None
@@ -340,136 +505,163 @@ class GlobalConfiguration:
         if "is-master" in data:
             self._is_master=data["is-master"]
 
+    def _get_sync_configs(self):
+        """Get all the sync. objects as a dictionary indexed by the target's name, prefixed by "R" for
+        the "import" targets, and by "W" for the "export" targets"""
+        if self._sync_configs is None:
+            sync_configs={}
+            sync_objects={False: [], True: []}
+            for entry in self._deploy:
+                sdata=self._deploy[entry]
+                if "reader-conf" in sdata:
+                    fname=None
+                    if sdata["reader-conf"] is not None:
+                        fname="%s/storage-credentials/%s"%(self._path, sdata["reader-conf"])
+                        if not os.path.isfile(fname):
+                            raise Exception(_(f"'reader-conf' file '{fname}' not found for entry '{entry}'"))
+                    sync_configs["R"+entry]=Sync.SyncConfig(entry, sdata["root"], fname)
+                    sync_objects[False].append(sync_configs["R"+entry])
+                if "writer-conf" in sdata:
+                    if "reader-conf" in sdata and sdata["writer-conf"]==sdata["reader-conf"]:
+                        # same credentials for both ways: share the (read only) sync. object
+                        sync_configs["W"+entry]=sync_configs["R"+entry]
+                    else:
+                        fname=None
+                        if sdata["writer-conf"] is not None:
+                            fname="%s/storage-credentials/%s"%(self._path, sdata["writer-conf"])
+                            if not os.path.isfile(fname):
+                                raise Exception(_(f"'writer-conf' file '{fname}' not found for entry '{entry}'"))
+                        sync_configs["W"+entry]=Sync.SyncConfig(entry, sdata["root"], fname)
+                    sync_objects[True].append(sync_configs["W"+entry])
+            self._sync_objects=sync_objects
+            self._sync_configs=sync_configs
+        return self._sync_configs
+
     def get_target_sync_object(self, target, way_out):
         """Get the specified sync. target (as named in the global inseca.json file)
         @way_out specified the required target type: True to "export" data, and False to "import" it.
         """
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
         if way_out:
             name="W"+target
         else:
             name="R"+target
-        if name in self._sync_configs:
-            return self._sync_configs[name]
+        sync_configs=self._get_sync_configs()
+        if name in sync_configs:
+            return sync_configs[name]
         raise Exception(_("Unknown synchronization target '%s'")%target)
 
     def get_all_sync_objects(self, way_out):
         """Get all the sync. targets for the specified type (see get_target_sync_object())"""
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
-        res=[]
-        for key in self._sync_configs:
-            if key[0]=="R" and not way_out or key[0]=="W" and way_out:
-                res+=[self._sync_configs[key]]
-        return res
+        self._get_sync_configs()
+        return list(self._sync_objects[bool(way_out)])
 
     def _sort_configs(self, configs):
-        data={} # key: description, value=[] of config objects having that description
-        for uid in configs:
-            conf=configs[uid]
-            if conf.descr not in data:
-                data[conf.descr]=[]
-            data[conf.descr]+=[conf]
-        res={}
-        keys=list(data.keys())
-        keys.sort()
-        for descr in keys:
-            for conf in data[descr]:
-                res[conf.id]=conf
-        return res
+        # sorted() is stable: configurations having the same description keep their relative order
+        return {conf.id: conf for conf in sorted(configs.values(), key=operator.attrgetter("descr"))}
 
     def _load_build_configs(self):
         """Load all live configurations as a dict of live Linux configurations indexed by config ID"""
-        tpath="%s/build-configurations"%self._path
-        if not os.path.exists(tpath):
+        tpath=f"{self._path}/build-configurations"
+        try:
+            entries=_list_config_entries(tpath)
+        except FileNotFoundError:
             # no build configuration, which is normal in the admin environment
             self._build_configs={}
             return
 
         res={}
-        for cdir in os.listdir(tpath):
-            cpath="%s/%s"%(tpath, cdir)
-            if cdir[0]=="_" or not os.path.isdir(cpath):
+        for entry in entries:
+            if not entry.is_dir():
                 continue # ignore this
-            cfile="%s/build-configuration.json"%cpath
-            if not os.path.exists(cfile):
+            cfile=f"{entry.path}/build-configuration.json"
+            try:
+                conf=BuildConfig(self, cfile)
+            except Exception:
+                if os.path.exists(cfile):
+                    raise
                 util.print_event("WARNING: missing build configuration file '%s', configuration ignored"%self.get_relative_path(cfile))
             else:
-                conf=BuildConfig(self, cfile)
                 if conf.id in self._all_conf_ids and conf.config_file!=cfile:
                     raise Exception(_(f"Build configuration '{conf.id}' already exists (in '{conf.config_file}', loaded from '{cfile}')"))
                 res[conf.id]=conf
-                self._all_conf_ids+=[conf.id]
+                self._all_conf_ids.add(conf.id)
         self._build_configs=self._sort_configs(res)
 
     def _load_install_configs(self):
         """Load all install configurations as a dict of the install configurations indexed by config ID"""
         res={}
-        tpath="%s/install-configurations"%self._path
-        for cdir in os.listdir(tpath):
-            cpath="%s/%s"%(tpath, cdir)
-            if cdir[0]=="_" or not os.path.isdir(cpath):
+        tpath=f"{self._path}/install-configurations"
+        for entry in _list_config_entries(tpath):
+            if not entry.is_dir():
                 continue # ignore this
-            cfile="%s/install-configuration.json"%cpath
-            if not os.path.exists(cfile):
+            cfile=f"{entry.path}/install-configuration.json"
+            try:
+                conf=InstallConfig(self, cfile)
+            except Exception:
+                if os.path.exists(cfile):
+                    raise
                 util.print_event("WARNING: missing install configuration file '%s' configuration ignored"%self.get_relative_path(cfile))
             else:
-                conf=InstallConfig(self, cfile)
                 if conf.id in self._all_conf_ids and conf.config_file!=cfile:
                     raise Exception(_(f"Install configuration '{conf.id}' already exists (in '{conf.config_file}', loaded from '{cfile}')"))
                 res[conf.id]=conf
-                self._all_conf_ids+=[conf.id]
+                self._all_conf_ids.add(conf.id)
         self._install_configs=self._sort_configs(res)
 
     def _load_format_configs(self):
         """Load all format configurations as a dict of the format configurations indexed by config ID"""
         res={}
-        tpath="%s/format-configurations"%self._path
-        for cdir in os.listdir(tpath):
-            cpath="%s/%s"%(tpath, cdir)
-            if cdir[0]=="_" or not os.path.isdir(cpath):
+        tpath=f"{self._path}/format-configurations"
+        for entry in _list_config_entries(tpath):
+            if not entry.is_dir():
                 continue # ignore this
-            cfile="%s/format-configuration.json"%cpath
-            if not os.path.exists(cfile):
+            cfile=f"{entry.path}/format-configuration.json"
+            try:
+                conf=FormatConfig(self, cfile)
+            except Exception:
+                if os.path.exists(cfile):
+                    raise
                 raise Exception(_("Missing format configuration file '%s'")%self.get_relative_path(cfile))
-            conf=FormatConfig(self, cfile)
             if conf.id in self._all_conf_ids and conf.config_file!=cfile:
                 raise Exception(_(f"Format configuration '{conf.id}' already exists (in '{conf.config_file}', loaded from '{cfile}')"))
             res[conf.id]=conf
-            self._all_conf_ids+=[conf.id]
+            self._all_conf_ids.add(conf.id)
         self._format_configs=self._sort_configs(res)
 
     def _load_domain_configs(self):
         """Load all domain configurations ad a dict of the install configurations indexed by config ID"""
         res={}
-        tpath="%s/domain-configurations"%self._path
-        for cfile in os.listdir(tpath):
-            cpath="%s/%s"%(tpath, cfile)
-            if cfile[0]=="_" or not os.path.isfile(cpath):
+        tpath=f"{self._path}/domain-configurations"
+        for entry in _list_config_entries(tpath):
+            if not entry.is_file():
                 continue # ignore this
-            conf=DomainConfig(self, cpath)
+            cfile=entry.name
+            conf=DomainConfig(self, entry.path)
             if conf.id in self._all_conf_ids and conf.config_file!=cfile:
                 raise Exception(_(f"Domain configuration '{conf.id}' already exists (in '{conf.config_file}', loaded from '{cfile}')"))
             res[conf.id]=conf
-            self._all_conf_ids+=[conf.id]
+            self._all_conf_ids.add(conf.id)
         self._domain_configs=self._sort_configs(res)
 
-    def _load_repo_configs(self, path=None):
-        """Load all domain configurations as a dict of the install configurations indexed by config ID"""
-        if path is None:
-            self._repo_configs={}
-            path="%s/repo-configurations"%self._path
-            self._load_repo_configs(path)
-            self._repo_configs=self._sort_configs(self._repo_configs)
-            return
-
-        for cfile in os.listdir(path):
-            cpath="%s/%s"%(path, cfile)
-            if cfile[0]=="_":
-                continue # ignore this
-            if os.path.isdir(cpath):
-                self._load_repo_configs(cpath)
+    def _load_repo_configs(self):
+        """Load all repository configurations (including the ones in sub directories) as a dict of the repository
+        configurations indexed by config ID"""
+        res={}
+        repos_dir=os.environ.get("INSECA_DEFAULT_REPOS_DIR")
+        # directories being listed, as a stack of iterators over their entries to keep the depth-first order
+        stack=[iter(_list_config_entries(f"{self._path}/repo-configurations"))]
+        while stack:
+            entry=next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                continue
+            cpath=entry.path
+            if entry.is_dir():
+                stack.append(iter(_list_config_entries(cpath)))
             else:
                 conf=RepoConfig(self, cpath)
                 if conf.id in self._all_conf_ids:
@@ -477,17 +669,19 @@ class GlobalConfiguration:
                         raise Exception(_(f"Duplicate repository configuration '{conf.id}' already exists (in '{conf.config_file}', loaded from '{cpath}')"))
                 else:
                     if not os.path.isabs(conf.path):
-                        if "INSECA_DEFAULT_REPOS_DIR" in os.environ:
-                            conf.path="%s/%s"%(os.environ["INSECA_DEFAULT_REPOS_DIR"], conf.path)
+                        if repos_dir is not None:
+                            conf.path=f"{repos_dir}/{conf.path}"
                         else:
-                            conf.path="%s/repos/%s"%(self.path, conf.path)
-                    self._repo_configs[conf.id]=conf
-                    self._all_conf_ids+=[conf.id]
+                            conf.path=f"{self.path}/repos/{conf.path}"
+                    res[conf.id]=conf
+                    self._all_conf_ids.add(conf.id)
+        self._repo_configs=self._sort_configs(res)
+        self._repo_configs_by_file={conf.config_file: conf for conf in self._repo_configs.values()}
 
     def get_any_conf(self, conf:str, exception_if_not_found=True) -> ConfigInterface:
         """Get a ConfigInterface object from its ID, or actual config file path,
         or its description (or part of it)"""
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
         res=self.get_build_conf(conf, exception_if_not_found=False)
         if res is not None:
@@ -511,7 +705,7 @@ class GlobalConfiguration:
     def get_build_conf(self, build_conf:str, exception_if_not_found=True) -> BuildConfig:
         """Get a build config. object from its ID or actual config file path,
         or its description (or part of it)"""
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
         if build_conf in self._build_configs:
             return self._build_configs[build_conf]
@@ -522,7 +716,7 @@ class GlobalConfiguration:
     def get_install_conf(self, install_conf:str, exception_if_not_found=True) -> InstallConfig:
         """Get an install config. object from its ID or actual config file path,
         or its description (or part of it)"""
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
         if install_conf in self._install_configs:
             return self._install_configs[install_conf]
@@ -533,7 +727,7 @@ class GlobalConfiguration:
     def get_format_conf(self, format_conf:str, exception_if_not_found=True) -> FormatConfig:
         """Get a format config. object from its ID or actual config file path
         or its description (or part of it)"""
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
         if format_conf in self._format_configs:
             return self._format_configs[format_conf]
@@ -544,7 +738,7 @@ class GlobalConfiguration:
     def get_domain_conf(self, domain_conf:str, exception_if_not_found=True) -> DomainConfig:
         """Get an install config. object from its ID or actual config file path
         or its description (or part of it)"""
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
         if domain_conf in self._domain_configs:
             return self._domain_configs[domain_conf]
@@ -554,7 +748,7 @@ class GlobalConfiguration:
 
     def get_repo_conf(self, repo_conf:str, exception_if_not_found=True) -> RepoConfig:
         """Get a repo config. object from its ID or actual config file path"""
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
         if not repo_conf:
             if exception_if_not_found:
@@ -563,24 +757,39 @@ class GlobalConfiguration:
 
         if repo_conf in self._repo_configs:
             return self._repo_configs[repo_conf]
-        rpath=os.path.realpath(repo_conf)
-        if os.path.exists(rpath):
-            for uid in self._repo_configs:
-                if self._repo_configs[uid].config_file==rpath:
-                    return self._repo_configs[uid]
+        rconf=self._repo_configs_by_file.get(os.path.realpath(repo_conf))
+        if rconf is not None:
+            return rconf
         if exception_if_not_found:
             raise Exception(_("Unknown repo configuration '%s'")%repo_conf)
         return None
 
+    def get_referencing_configurations(self, conf_id:str) -> list[ConfigInterface]:
+        """Get the configurations which reference the configuration identified by @conf_id
+        (see ConfigInterface.get_referenced_by_configurations())"""
+        if not self._ready:
+            raise Exception("Configuration has not yet been fully loaded")
+        if self._referencing_configs is None:
+            # reverse index of all the configurations' references, computed when first needed
+            referencing={}
+            for configs in (self._build_configs, self._install_configs, self._format_configs, self._domain_configs):
+                for conf in configs.values():
+                    for rconf in conf.get_referenced_configurations():
+                        res=referencing.setdefault(rconf.id, [])
+                        if not res or res[-1] is not conf:
+                            res.append(conf)
+            self._referencing_configs=referencing
+        return list(self._referencing_configs.get(conf_id, ()))
+
     def get_install_elements(self, install_conf, archive=None):
         """Analyse @install_conf and returns the elements required to manage installations as a tuple:
         - the path to the live Linux ISO file
         - the path to userdata specs file
-        - the build infos
+        - the build infos (shared between calls, must not be modified)
         If @archive is specified, it is used instead of the last one available
         NB: call release_install_elements() when the returned resources are not used anymore
         """
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
         if not isinstance(install_conf, InstallConfig):
             raise Exception("CODEBUG: @install_conf is not an InstallConfig object")
@@ -590,36 +799,46 @@ class GlobalConfiguration:
             (ts, barname)=rconf.get_latest_archive()
             if barname is None:
                 raise Exception(_("No build archive available"))
+            self._install_elements_archives[install_conf.id]=barname
         else:
             if not rconf.archive_exists(archive):
                 raise Exception(_("No archive '%s' in repository"))
             barname=archive
 
-        cdir=rconf.get_archive_dir_from_cache(barname)
-        if cdir is None:
-            cdir=rconf.mount(barname)
-        linuximage="%s/%s"%(cdir, file_iso)
-        if not os.path.exists(linuximage):
-            raise Exception(_(f"Build repo '{rconf.id}' seems corrupted: missing the '{file_iso}' file in archive '{barname}'"))
-
-        linuxuserdata="%s/%s"%(cdir, file_userdata)
-        if not os.path.exists(linuxuserdata):
-            raise Exception(_(f"Build repo '{rconf.id}' seems corrupted: missing the '{file_userdata}' file in archive '{barname}'"))
-
-        infosfile="%s/%s"%(cdir, file_infos)
-        if not os.path.exists(infosfile):
-            raise Exception(_(f"Build repo '{rconf.id}' seems corrupted: missing the '{file_infos}' file in archive '{barname}'"))
-        infos=json.load(open(infosfile, "r"))
-
-        return (linuximage, linuxuserdata, infos)
+        cdir=rconf.mount(barname)
+        # list the archive's top directory once instead of probing each file (costly on a Borg FUSE mount)
+        try:
+            with os.scandir(cdir) as it:
+                fnames={entry.name for entry in it}
+        except (FileNotFoundError, NotADirectoryError):
+            fnames=set()
+
+        missing=[fname for fname in (file_iso, file_userdata, file_infos) if fname not in fnames]
+        if missing:
+            missing=", ".join([f"'{fname}'" for fname in missing])
+            raise Exception(_(f"Build repo '{rconf.id}' seems corrupted: missing the {missing} file(s) in archive '{barname}'"))
+
+        # the infos file is only parsed once per archive, as archives are never modified (its path can't
+        # be used to identify it: a mounted archive gets a new mount point each time)
+        key=(rconf.id, barname)
+        infos=self._build_infos.get(key)
+        if infos is None:
+            infos=_load_json(f"{cdir}/{file_infos}")
+            self._build_infos[key]=infos
+        return (f"{cdir}/{file_iso}", f"{cdir}/{file_userdata}", infos)
 
     def release_install_elements(self, install_conf, archive=None):
         """Release resources accessed when get_install_elements() was called"""
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
         rconf=self.get_repo_conf(install_conf.build_repo_id)
         if archive is None:
-            (ts, barname)=rconf.get_latest_archive()
+            # release the archive actually used by get_install_elements(), without listing the repository again
+            barname=self._install_elements_archives.pop(install_conf.id, None)
+            if barname is None:
+                if next(rconf.iter_mounted_archives(), None) is None:
+                    return # nothing mounted, no need to list the repository's archives
+                (ts, barname)=rconf.get_latest_archive()
         else:
             if not rconf.archive_exists(archive):
                 raise Exception(_("No archive '%s' in repository"))
@@ -630,47 +849,76 @@ class GlobalConfiguration:
             if cdir is None:
                 try:
                     rconf.umount(barname)
-                except:
-                    pass
+                except Exception:
+                    pass # best effort, the archive will be unmounted anyway when the Borg repository object is released
 
     def umount_all_repos(self):
         """Force unmounting all the repositories' archives which are still mounted"""
-        if not self.ready:
+        if not self._ready:
             raise Exception("Configuration has not yet been fully loaded")
-        for ruid in self._repo_configs:
-            rconf=self._repo_configs[ruid]
-            rconf.umount_all()
+        # only the repositories having mounted archives are handled; each unmount waits for the FUSE
+        # process to terminate, so the repositories are handled concurrently
+        rconfs=[rconf for rconf in self._repo_configs.values() if next(rconf.iter_mounted_archives(), None) is not None]
+        if len(rconfs)>1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(32, len(rconfs))) as executor:
+                list(executor.map(RepoConfig.umount_all, rconfs))
+        else:
+            for rconf in rconfs:
+                rconf.umount_all()
 
     #
     # helping the update process
     #
     def create_update_dir(self, ensure_empty=True):
         """Create a directory which the updgrade process can use"""
-        path="%s/.tmp-update"%self.path
-        if ensure_empty and os.path.exists(path):
-            shutil.rmtree(path)
+        path=f"{self.path}/.tmp-update"
+        if ensure_empty:
+            try:
+                with os.scandir(path) as it:
+                    empty=next(it, None) is None
+                if not empty:
+                    shutil.rmtree(path)
+            except FileNotFoundError:
+                pass
         os.makedirs(path, exist_ok=True)
         return path
 
     def merge_update(self):
         """Final step in the merge process: replace any directory in the update dir (see create_update_dir())
         which also exists in the global configuration directory"""
-        if self.archives_cache_dir.startswith(self.path):
+        if self._archives_cache_dir is None:
+            raise Exception(_("The archives_cache_dir property has not yet been defined"))
+        if self._archives_cache_dir_in_path:
             raise Exception(_("Archives cache directory cannot be a subdirectory of the configuration's global directory"))
         upd_path=self.create_update_dir(ensure_empty=False)
-        upd_fnames=os.listdir(upd_path)
-        cur_fnames=os.listdir(self.path)
-        for fname in cur_fnames:
-            if fname in upd_fnames:
-                cur_path="%s/%s"%(self.path, fname)
-                if os.path.isdir(cur_path):
+        with os.scandir(upd_path) as it:
+            upd_entries=list(it)
+        if not upd_entries:
+            return # nothing to merge
+        cur_prefix=f"{self.path}/"
+        # identify the entries to replace (value: True if it's a directory), probing each of them if there are only
+        # a few, or listing the whole configuration directory otherwise
+        if len(upd_entries)<_merge_probe_max:
+            cur_entries={}
+            for upd_entry in upd_entries:
+                try:
+                    cur_entries[upd_entry.name]=stat.S_ISDIR(os.lstat(cur_prefix+upd_entry.name).st_mode)
+                except FileNotFoundError:
+                    pass
+        else:
+            with os.scandir(self.path) as it:
+                cur_entries={entry.name: entry.is_dir(follow_symlinks=False) for entry in it}
+        for upd_entry in upd_entries:
+            fname=upd_entry.name
+            cur_path=cur_prefix+fname
+            is_dir=cur_entries.get(fname)
+            if is_dir is not None:
+                if is_dir:
                     shutil.rmtree(cur_path)
-                else:
-                    os.remove(cur_path)
-                shutil.move("%s/%s"%(upd_path, fname), cur_path)
-        for fname in upd_fnames:
-            if fname not in cur_fnames:
-                shutil.move("%s/%s"%(upd_path, fname), "%s/%s"%(self.path, fname))
+                elif upd_entry.is_dir(follow_symlinks=False):
+                    os.remove(cur_path) # os.replace() can't replace a file by a directory
+            # the update directory is in the configuration directory, so this is a simple rename()
+            os.replace(upd_entry.path, cur_path)
 
 @dataclass
 class ConfigStatus():
@@ -717,27 +965,7 @@ class ConfigInterface(ABC):
 
     def get_referenced_by_configurations(self) -> list[ConfigInterface]:
         """Get the configurations which reference this configuration (i.e. which need this configuration)"""
-        res=[]
-        for cid, conf in self.global_conf._build_configs.items():
-            for rconf in conf.get_referenced_configurations():
-                if rconf.id==self.id and conf not in res:
-                    res.append(conf)
-        for cid, conf in self.global_conf._install_configs.items():
-            for rconf in conf.get_referenced_configurations():
-                if rconf.id==self.id and conf not in res:
-                    res.append(conf)
-
-        for cid, conf in self.global_conf._format_configs.items():
-            for rconf in conf.get_referenced_configurations():
-                if rconf.id==self.id and conf not in res:
-                    res.append(conf)
-            
-        for cid, conf in self.global_conf._domain_configs.items():
-            for rconf in conf.get_referenced_configurations():
-                if rconf.id==self.id and conf not in res:
-                    res.append(conf)
-
-        return res
+        return self.global_conf.get_referencing_configurations(self.id)
 
     @abstractmethod
     def get_referenced_configurations(self) -> list[ConfigInterface]:
@@ -795,8 +1023,10 @@ class BuildConfig(ConfigInterface):
     """Represents a live Linux configuration"""
     def __init__(self, global_conf:GlobalConfiguration, configfile:str):
         super().__init__(global_conf, configfile)
+        self._components_index=None # key=component name, value=component's source directory
+        self._components_extra_dir=os.environ.get("INSECA_EXTRA_COMPONENTS")
         try:
-            self._parse(json.load(open(configfile, "r")))
+            self._parse(_load_json(configfile))
         except Exception as e:
             raise Exception(_(f"Invalid file '{configfile}' format: {str(e)}"))
         self._status=None
@@ -812,13 +1042,7 @@ class BuildConfig(ConfigInterface):
 
     @property
     def build_type(self):
-        if "inseca-live-admin" in self._components:
-            return BuildType.ADMIN
-        if "inseca-live-wks" in self._components:
-            return BuildType.WKS
-        if "inseca-live-server" in self._components:
-            return BuildType.SERVER
-        return BuildType.SIMPLE
+        return self._build_type
 
     @property
     def descr(self):
@@ -839,7 +1063,7 @@ class BuildConfig(ConfigInterface):
     def _create_new(global_conf:GlobalConfiguration, descr:str, subtype:BuildType, path:str, ruid:str) -> str:
         buid="build-%s"%str(uuid.uuid4())
         (privdata_encrypt_key_priv, privdata_encrypt_key_pub)=x509.gen_rsa_key_pair()
-        res_path=os.path.join(os.path.dirname(__file__), "../tools/resources")
+        res_path=_resources_dir
         if subtype==BuildType.ADMIN:
             # create an ADMIN build configuration (no associated repo)
             repl={
@@ -925,7 +1149,7 @@ class BuildConfig(ConfigInterface):
             #  using a new GlobalConfiguration object
             gconf2=GlobalConfiguration(gconf.path)
             cloned=gconf2.get_build_conf(nuid)
-            data=json.loads(util.load_file_contents(cloned.config_file))
+            data=_load_json(cloned.config_file)
             data["components"]=self.components
             data["validity-months"]=self._validity_months
             data["version"]=self._version
@@ -979,16 +1203,12 @@ class BuildConfig(ConfigInterface):
     @property
     def privdata_pubkey(self):
         """Full path of the file containing the public key to encrypt PRIVDATA"""
-        if self._privdata_pubkey:
-            return "%s/%s"%(self.config_dir, self._privdata_pubkey)
-        return None
+        return self._privdata_pubkey
 
     @property
     def privdata_privkey(self):
         """Full path of the file containing the public key to encrypt PRIVDATA"""
-        if self._privdata_privkey:
-            return "%s/%s"%(self.config_dir, self._privdata_privkey)
-        return None
+        return self._privdata_privkey
 
     @property
     def signing_privkey(self):
@@ -1031,35 +1251,31 @@ class BuildConfig(ConfigInterface):
 
     @property
     def components_extra_dir(self):
-        components_path_extra=None
-        if "INSECA_EXTRA_COMPONENTS" in os.environ:
-            components_path_extra=os.environ["INSECA_EXTRA_COMPONENTS"]
-            if not os.path.isdir(components_path_extra):
-                components_path_extra=None # ignore thah buggy setting
+        components_path_extra=self._components_extra_dir
+        if components_path_extra is not None and not os.path.isdir(components_path_extra):
+            components_path_extra=None # ignore thah buggy setting
         return components_path_extra
 
     @property
     def base_os_component(self):
         components_path_builtin=self.components_builtin_dir
         for component in self._components:
-            comp_conf=f"{components_path_builtin}/{component}/config.json"
-            if os.path.exists(comp_conf):
-                cdata=json.load(open(comp_conf, "r"))
-                if "base-os" in cdata["provides"]:
-                    return component
+            cdata=_load_component_conf(f"{components_path_builtin}/{component}/config.json", missing_ok=True)
+            if cdata is not None and "base-os" in cdata["provides"]:
+                return component
         raise Exception("Missing a 'base-os' component")
 
     @property
     def image_iso_file(self):
-        return "%s/%s/%s"%(self._build_dir, self._id, file_iso)
+        return self._image_iso_file
 
     @property
     def image_userdata_specs_file(self):
-        return "%s/%s/%s"%(self._build_dir, self._id, file_userdata)
+        return self._image_userdata_specs_file
 
     @property
     def image_infos_file(self):
-        return "%s/%s/%s"%(self._build_dir, self._id, file_infos)
+        return self._image_infos_file
 
     @property
     def userdata_specs(self):
@@ -1084,68 +1300,60 @@ class BuildConfig(ConfigInterface):
         components_path_extra=self.components_extra_dir
         userdata_specs={}
         for component in self.components:
-            comp_conf=None
+            # an extra component only takes precedence over the builtin one if it has a config.json file
+            cdata=None
             if components_path_extra:
-                comp_conf="%s/%s/config.json"%(components_path_extra, component)
-                if not os.path.exists(comp_conf):
-                    comp_conf=None
-            if not comp_conf:
-                comp_conf="%s/%s/config.json"%(components_path_builtin, component)
-            if os.path.exists(comp_conf):
-                cdata=json.load(open(comp_conf, "r"))
-                if "userdata" in cdata and len(cdata["userdata"])>0:
-                    userdata_specs[component]=cdata["userdata"]
+                cdata=_load_component_conf(f"{components_path_extra}/{component}/config.json", missing_ok=True)
+            if cdata is None:
+                cdata=_load_component_conf(f"{components_path_builtin}/{component}/config.json", missing_ok=True)
+                if cdata is None:
+                    continue # component not found
+            if "userdata" in cdata and len(cdata["userdata"])>0:
+                userdata_specs[component]=cdata["userdata"]
         return userdata_specs
 
     def _parse(self, data):
         if not isinstance(data, dict):
             raise Exception("Invalid configuration: not a dictionary")
-        specs={
-            "id": [str, False, True],
-            "descr": [str, False, True],
-            "l10n": [dict, True, False],
-            "version": [str, False, True],
-            "build-dir": [str, False, True],
-            "repo": [str, True, True],
-            "privdata-ekey-pub-file": [str, True, True],
-            "privdata-ekey-priv-file": [str, True, True],
-            "components": [dict, False, True],
-            "validity-months": [int, False, True]
-        }
         try:
-            _validate_attributes(data, specs)
+            _validate_attributes(data, _build_conf_specs)
         except Exception as e:
             raise Exception(f"Invalid live configuration '{self.config_file}': {str(e)}")
         self._id=data["id"]
         self._repo_id=data["repo"]
         self._version=data["version"]
         self._validity_months=int(data["validity-months"])
-        self._privdata_pubkey=data["privdata-ekey-pub-file"]
-        self._privdata_privkey=data["privdata-ekey-priv-file"]
+        config_dir=self.config_dir
+        self._privdata_pubkey=f"{config_dir}/{data['privdata-ekey-pub-file']}" if data["privdata-ekey-pub-file"] else None
+        self._privdata_privkey=f"{config_dir}/{data['privdata-ekey-priv-file']}" if data["privdata-ekey-priv-file"] else None
 
         now=datetime.date.today()
         month=now.month-1+self._validity_months
         year=now.year+month//12
         month=month%12+1
         day=min(now.day, calendar.monthrange(year,month)[1])
-        self._valid_to=int(datetime.date(year, month, day).strftime('%s'))
+        self._valid_to=calendar.timegm(datetime.date(year, month, day).timetuple())
 
         self._build_dir=data["build-dir"]
+        self._image_iso_file=f"{self._build_dir}/{self._id}/{file_iso}"
+        self._image_userdata_specs_file=f"{self._build_dir}/{self._id}/{file_userdata}"
+        self._image_infos_file=f"{self._build_dir}/{self._id}/{file_infos}"
         self._components=data["components"]
         self._descr=data["descr"]
 
+        if "inseca-live-admin" in self._components:
+            self._build_type=BuildType.ADMIN
+        elif "inseca-live-wks" in self._components:
+            self._build_type=BuildType.WKS
+        elif "inseca-live-server" in self._components:
+            self._build_type=BuildType.SERVER
+        else:
+            self._build_type=BuildType.SIMPLE
+
         if "l10n" in data:
-            specs={
-                "timezone": [str, False, True],
-                "locale": [str, False, True],
-                "keyboard-layout": [str, True, False],
-                "keyboard-model": [str, True, False],
-                "keyboard-variant": [str, True, False],
-                "keyboard-option": [str, True, False]
-            }
             l10ndata=data["l10n"]
             try:
-                _validate_attributes(l10ndata, specs)
+                _validate_attributes(l10ndata, _l10n_specs)
             except Exception as e:
                 raise Exception(f"Invalid live configuration's l10n data '{self.config_file}': {str(e)}")
             self._l10n=L10N(timezone=l10ndata.get("timezone"), locale=l10ndata.get("locale"), keyboard_layout=l10ndata.get("keyboard-layout"),
@@ -1155,6 +1363,7 @@ class BuildConfig(ConfigInterface):
             self._l10n=L10N(timezone="UTC", locale="en_US.UTF-8", keyboard_layout="en", keyboard_model="pc105")
 
     def _get_pending_iso(self):
+        import LiveBuilder # imported here as it imports this module, and is only required here
         builder=LiveBuilder.Builder(self.id)
         iso_img_file=builder.image_file
         if os.path.exists(iso_img_file):
@@ -1174,12 +1383,14 @@ class BuildConfig(ConfigInterface):
             cdefs[cid]=None
             try:
                 cfile=self.get_component_src_dir(cid)+"/config.json"
-                if not os.path.exists(cfile):
-                    errors.append(f"Component '{cid}' does not have any config.json configuration file")
                 try:
-                    cdata=json.load(open(cfile, "r"))
+                    cdata=_load_component_conf(cfile)
+                except FileNotFoundError:
+                    errors.append(f"Component '{cid}' does not have any config.json configuration file")
+                    continue
                 except Exception as e:
                     errors.append(f"Invalid or unreadable config.json configuration file for component '{cid}'")
+                    continue
                 cdefs[cid]=cdata
                 if "provides" not in cdata:
                     errors.append(f"Configuration of component '{cid}' is invalid: no 'provides' attribute")
@@ -1272,14 +1483,29 @@ class BuildConfig(ConfigInterface):
             raise Exception("Configuration is invalid")
 
 
+    def _get_components_index(self):
+        """Get all the available components' source directories, listing the builtin and extra components
+        directories only once (the extra components take precedence over the builtin ones)"""
+        if self._components_index is None:
+            index={}
+            for components_path in (self.components_builtin_dir, self.components_extra_dir):
+                if components_path is None:
+                    continue
+                try:
+                    with os.scandir(components_path) as entries:
+                        for entry in entries:
+                            if entry.is_dir():
+                                index[entry.name]=entry.path
+                except FileNotFoundError:
+                    pass
+            self._components_index=index
+        return self._components_index
+
     def get_component_src_dir(self, component):
-        components_path_builtin=self.components_builtin_dir
-        components_path_extra=self.components_extra_dir
-        if components_path_extra is not None and os.path.exists(f"{components_path_extra}/{component}"):
-            return f"{components_path_extra}/{component}"
-        if os.path.exists(f"{components_path_builtin}/{component}"):
-            return f"{components_path_builtin}/{component}"
-        raise Exception("Component '%s' not found"%component)
+        path=self._get_components_index().get(component)
+        if path is None:
+            raise Exception("Component '%s' not found"%component)
+        return path
 
     def get_component_blobs_dirs(self, component, ignore_missing=False):
         base_os_component=self.base_os_component
@@ -1301,7 +1527,7 @@ class InstallConfig(ConfigInterface):
         super().__init__(global_conf, configfile)
         self._build_id=None
         try:
-            self._parse(json.load(open(configfile, "r")))
+            self._parse(_load_json(configfile))
         except Exception as e:
             err=str(e)
             raise Exception(_(f"Invalid file '{configfile}' format: {err}"))
@@ -1376,7 +1602,7 @@ class InstallConfig(ConfigInterface):
             "build": build_repo,
             "rescue": json.dumps(password)[1:-1] # properly encore password as JSON string
         }
-        res_path=os.path.join(os.path.dirname(__file__), "../tools/resources")
+        res_path=_resources_dir
         data=util.load_file_contents("%s/template-install.json"%(res_path))
         data=ValueHolder.replace_variables(data, repl, ignore_missing=True)
 
@@ -1463,7 +1689,7 @@ class InstallConfig(ConfigInterface):
             # copy components using a new GlobalConfiguration object
             gconf2=GlobalConfiguration(gconf.path) # needs to be re-created here anywaus because we added a new install config
             cloned=gconf2.get_install_conf(nuid)
-            data=json.loads(util.load_file_contents(cloned.config_file))
+            data=_load_json(cloned.config_file)
             for part in ("dev-format", "install", "parameters", "userdata"):
                 data[part]=self._data[part]
             util.write_data_to_file(json.dumps(data, indent=4), cloned.config_file)
@@ -1541,19 +1767,19 @@ class InstallConfig(ConfigInterface):
     @property
     def devicemeta_pubkey(self):
         """Full path of the file containing the public key to verify the signnature of the device's metadata"""
-        return "%s/%s"%(self.config_dir, self._devicemeta_pubkey)
+        return self._devicemeta_pubkey
 
     @property
     def devicemeta_privkey(self):
         """Full path of the file containing the private key to sign the device's metadata"""
-        return "%s/%s"%(self.config_dir, self._devicemeta_privkey)
+        return self._devicemeta_privkey
 
     @property
     def signing_pubkey(self):
         """Full path of the file containing the public signing key for which the associated private key is used to add a signature when a new live build was published
         (Refer to the associated's build config).
         """
-        return "%s/%s"%(self.config_dir, self._build_sign_pubkey)
+        return self._build_sign_pubkey
 
     @property
     def password_rescue(self):
@@ -1574,22 +1800,8 @@ class InstallConfig(ConfigInterface):
     def _parse(self, data):
         if not isinstance(data, dict):
             raise Exception("Invalid configuration: not a dictionary")
-        specs={
-            "id": [str, False, True],
-            "descr": [str, False, True],
-            "build-repo": [str, False, True],
-            "repo": [str, True, True],
-            "parameters": [dict, True, True],
-            "dev-format": [dict, False, True],
-            "devicemeta-skey-priv-file": [str, False, True],
-            "devicemeta-skey-pub-file": [str, False, True],
-            "build-skey-pub-file": [str, True, True],
-            "password-rescue": [str, False, True],
-            "install": [dict, False, True],
-            "userdata": [dict, False, False]
-        }
         try:
-            _validate_attributes(data, specs)
+            _validate_attributes(data, _install_conf_specs)
             params=data["parameters"]
             for pname in params:
                 _validate_parameter_definition(params[pname])
@@ -1600,9 +1812,10 @@ class InstallConfig(ConfigInterface):
         self._id=data["id"]
         self._build_repo_id=data["build-repo"]
         self._repo_id=data["repo"]
-        self._devicemeta_pubkey=data["devicemeta-skey-pub-file"]
-        self._devicemeta_privkey=data["devicemeta-skey-priv-file"]
-        self._build_sign_pubkey=data["build-skey-pub-file"]
+        config_dir=self.config_dir
+        self._devicemeta_pubkey=f"{config_dir}/{data['devicemeta-skey-pub-file']}"
+        self._devicemeta_privkey=f"{config_dir}/{data['devicemeta-skey-priv-file']}"
+        self._build_sign_pubkey=f"{config_dir}/{data['build-skey-pub-file']}"
         self._password_rescue=data["password-rescue"]
         self._userdata={}
         if "userdata" in data:
@@ -1613,28 +1826,19 @@ class InstallConfig(ConfigInterface):
         # the user defined
         ptype=data["dev-format"].get("type", "hybrid") # defaults to "hybrid" if not specified
         if ptype=="hybrid":
-            core_conf=json.load(open("%s/core-install-config-hybrid.json"%os.path.dirname(__file__), "r"))
+            core_conf=_load_core_conf("core-install-config-hybrid.json")
         else:
-            core_conf=json.load(open("%s/core-install-config.json"%os.path.dirname(__file__), "r"))
+            core_conf=_load_core_conf("core-install-config.json")
 
         # merge the configuration with the core configuration: parameters
         self._params_core=core_conf["parameters"]
         self._params_config=data["parameters"]
-        self._params_combined=self._params_core.copy()
-        for param in self._params_config:
-            if param in self._params_core:
-                raise Exception(_("Invalid parameter '%s': already part of core configuration")%param)
-            self._params_combined[param]=self._params_config[param]
+        self._params_combined=_merge_parameters(self._params_core, self._params_config)
 
         # merge the configuration with the core configuration: dev-format
         conf_dev_format=data["dev-format"]
         dev_fmt=core_conf["dev-format"]
-        for section in ("unprotected", "protected", "decryptors", "signatures"):
-            if section in conf_dev_format:
-                for entry in conf_dev_format[section]:
-                    if entry in dev_fmt[section]:
-                        raise Exception(_(f"Invalid configuration entry '{entry}' in section '{section}': already part of core configuration"))
-                    dev_fmt[section][entry]=conf_dev_format[section][entry]
+        _merge_dev_format(dev_fmt, conf_dev_format)
         self._dev_format=dev_fmt
         #print("SPEC: %s"%json.dumps(data, indent=4))
 
@@ -1766,7 +1970,7 @@ class FormatConfig(ConfigInterface):
         if not isinstance(global_conf, GlobalConfiguration):
             raise Exception("CODEBUG: @global_conf should be a GlobalConfiguration object")
         try:
-            self._parse(json.load(open(configfile, "r")))
+            self._parse(_load_json(configfile))
         except Exception as e:
             raise Exception(_(f"Invalid file '{configfile}' format: {str(e)}"))
         self._status=None
@@ -1804,7 +2008,7 @@ class FormatConfig(ConfigInterface):
             "repo": ruid,
             "rescue": json.dumps(password)[1:-1] # properly encore password as JSON string
         }
-        res_path=os.path.join(os.path.dirname(__file__), "../tools/resources")
+        res_path=_resources_dir
         data=util.load_file_contents(f"{res_path}/template-format.json")
         data=ValueHolder.replace_variables(data, repl, ignore_missing=True)
         conf_file=f"{path}/format-configuration.json"
@@ -1845,7 +2049,7 @@ class FormatConfig(ConfigInterface):
             # copy components using a new GlobalConfiguration object
             gconf2=GlobalConfiguration(gconf.path)
             cloned=gconf2.get_format_conf(nuid)
-            data=json.loads(util.load_file_contents(cloned.config_file))
+            data=_load_json(cloned.config_file)
             for part in ("dev-format", "parameters"):
                 data[part]=self._data[part]
             util.write_data_to_file(json.dumps(data, indent=4), cloned.config_file)
@@ -1909,12 +2113,12 @@ class FormatConfig(ConfigInterface):
     @property
     def devicemeta_pubkey(self):
         """Full path of the file containing the public key to verify the signnature of the device's metadata"""
-        return "%s/%s"%(self.config_dir, self._devicemeta_pubkey)
+        return self._devicemeta_pubkey
 
     @property
     def devicemeta_privkey(self):
         """Full path of the file containing the private key to sign the device's metadata"""
-        return "%s/%s"%(self.config_dir, self._devicemeta_privkey)
+        return self._devicemeta_privkey
 
     @property
     def password_rescue(self):
@@ -1923,18 +2127,8 @@ class FormatConfig(ConfigInterface):
     def _parse(self, data):
         if not isinstance(data, dict):
             raise Exception("Invalid configuration: not a dictionary")
-        specs={
-            "id": [str, False, True],
-            "descr": [str, False, True],
-            "repo": [str, True, True],
-            "parameters": [dict, True, True],
-            "dev-format": [dict, False, True],
-            "devicemeta-skey-priv-file": [str, False, True],
-            "devicemeta-skey-pub-file": [str, False, True],
-            "password-rescue": [str, False, True]
-        }
         try:
-            _validate_attributes(data, specs)
+            _validate_attributes(data, _format_conf_specs)
             params=data["parameters"]
             for pname in params:
                 _validate_parameter_definition(params[pname])
@@ -1944,8 +2138,9 @@ class FormatConfig(ConfigInterface):
         # top level information
         self._id=data["id"]
         self._repo_id=data["repo"]
-        self._devicemeta_pubkey=data["devicemeta-skey-pub-file"]
-        self._devicemeta_privkey=data["devicemeta-skey-priv-file"]
+        config_dir=self.config_dir
+        self._devicemeta_pubkey=f"{config_dir}/{data['devicemeta-skey-pub-file']}"
+        self._devicemeta_privkey=f"{config_dir}/{data['devicemeta-skey-priv-file']}"
         self._password_rescue=data["password-rescue"]
         self._userdata={}
         if "userdata" in data:
@@ -1954,26 +2149,17 @@ class FormatConfig(ConfigInterface):
         # load the core configuration which contains the hard coded parts of any format configuration
         # and which needs to be "merged" (or combined) with the parts provided by the format configurations'
         # the user defined
-        core_conf=json.load(open("%s/core-format-config.json"%os.path.dirname(__file__), "r"))
+        core_conf=_load_core_conf("core-format-config.json")
 
         # merge the configuration with the core configuration: parameters
         self._params_core=core_conf["parameters"]
         self._params_config=data["parameters"]
-        self._params_combined=self._params_core.copy()
-        for param in self._params_config:
-            if param in self._params_core:
-                raise Exception(_("Invalid parameter '%s': already part of core configuration")%param)
-            self._params_combined[param]=self._params_config[param]
+        self._params_combined=_merge_parameters(self._params_core, self._params_config)
 
         # merge the configuration with the core configuration: dev-format
         conf_dev_format=data["dev-format"]
         dev_fmt=core_conf["dev-format"]
-        for section in ("unprotected", "protected", "decryptors", "signatures"):
-            if section in conf_dev_format:
-                for entry in conf_dev_format[section]:
-                    if entry in dev_fmt[section]:
-                        raise Exception(_(f"Invalid configuration entry '{entry}' in section '{section}': already part of core configuration"))
-                    dev_fmt[section][entry]=conf_dev_format[section][entry]
+        _merge_dev_format(dev_fmt, conf_dev_format)
 
         # add any partition specified in the format configuration to the already existing one in the core-format-config.json file
         if "partitions" in data["dev-format"]:
@@ -2030,7 +2216,7 @@ class DomainConfig(ConfigInterface):
     def __init__(self, global_conf:GlobalConfiguration, configfile:str):
         super().__init__(global_conf, configfile)
         try:
-            self._parse(json.load(open(configfile, "r")))
+            self._parse(_load_json(configfile))
         except Exception as e:
             raise Exception(_(f"Invalid file '{configfile}' format: {str(e)}"))
         self._status=None
@@ -2068,7 +2254,7 @@ class DomainConfig(ConfigInterface):
             "domain": duid,
             "repo": ruid
         }
-        res_path=os.path.join(os.path.dirname(__file__), "../tools/resources")
+        res_path=_resources_dir
         data=util.load_file_contents("%s/template-domain.json"%(res_path))
         data=ValueHolder.replace_variables(data, repl)
         os.makedirs(os.path.dirname(conf_file), exist_ok=True)
@@ -2097,7 +2283,7 @@ class DomainConfig(ConfigInterface):
             # copy components using a new GlobalConfiguration object
             gconf2=GlobalConfiguration(gconf.path)
             cloned=gconf2.get_domain_conf(nuid)
-            data=json.loads(util.load_file_contents(cloned.config_file))
+            data=_load_json(cloned.config_file)
             data["install"]=self._install_ids
             data["format"]=self._format_ids
             util.write_data_to_file(json.dumps(data, indent=4), cloned.config_file)
@@ -2145,15 +2331,8 @@ class DomainConfig(ConfigInterface):
     def _parse(self, data):
         if not isinstance(data, dict):
             raise Exception("Invalid configuration: not a dictionary")
-        specs={
-            "id": [str, False, True],    
-            "descr": [str, False, True],
-            "repo": [str, True, True],
-            "install": [list, False, True],
-            "format": [list, False, True]
-        }
         try:
-            _validate_attributes(data, specs)
+            _validate_attributes(data, _domain_conf_specs)
         except Exception as e:
             raise Exception("Invalid live configuration '%s': %s"%(self.config_file, str(e)))
         self._id=data["id"]
@@ -2225,7 +2404,7 @@ class RepoConfig(ConfigInterface):
         super().__init__(global_conf, configfile)
         self._borg_repo=None
         try:
-            self._parse(json.load(open(configfile, "r")))
+            self._parse(_load_json(configfile))
         except Exception as e:
             err=str(e)
             raise Exception(_(f"Invalid file '{configfile}' format: {err}"))
@@ -2260,9 +2439,8 @@ class RepoConfig(ConfigInterface):
 
     @classmethod
     def _identify_free_repo_path(cls, global_conf:GlobalConfiguration) -> tuple(str, str):
-        if "INSECA_DEFAULT_REPOS_DIR" in os.environ:
-            base_repo_data_path=os.environ["INSECA_DEFAULT_REPOS_DIR"]
-        else:
+        base_repo_data_path=os.environ.get("INSECA_DEFAULT_REPOS_DIR")
+        if base_repo_data_path is None:
             base_repo_data_path=f"{global_conf.path}/repos"
         base_repo_data_path=os.path.realpath(base_repo_data_path)
         index=0
@@ -2289,6 +2467,7 @@ class RepoConfig(ConfigInterface):
             raise Exception(f"Repo configuration path '{repo_conf_path}' already exists")
 
         # create Borg repo
+        import Borg as borg
         borg_repo=borg.Repo(repo_data_path, None)
         password=borg_repo.init()
         
@@ -2333,6 +2512,7 @@ class RepoConfig(ConfigInterface):
             shutil.copytree(self.path, repo_data_path)
 
             # change password
+            import Borg as borg
             borg_repo=borg.Repo(repo_data_path, self.password)
             borg_repo.change_password(password)
             borg_repo.generate_new_id()
@@ -2351,7 +2531,10 @@ class RepoConfig(ConfigInterface):
 
         if self not in tokeep:
             shutil.rmtree(self.path, ignore_errors=True)
-            os.remove(self.config_file)
+            try:
+                os.remove(self.config_file)
+            except FileNotFoundError:
+                pass
 
     @property
     def archives_cache_dir(self):
@@ -2391,6 +2574,7 @@ class RepoConfig(ConfigInterface):
     def borg_repo(self):
         """Get the associated Borg repository object"""
         if self._borg_repo is None:
+            import Borg as borg
             if self.global_conf.is_master:
                 config_dir="%s/.borg/config"%self.global_conf.path
                 cache_dir="%s/.borg/cache"%self.global_conf.path
@@ -2403,23 +2587,16 @@ class RepoConfig(ConfigInterface):
     def _parse(self, data):
         if not isinstance(data, dict):
             raise Exception(_("Invalid configuration: not a dictionary"))
-        specs={
-            "id": [str, False, True],
-            "type": [str, False, True],
-            "descr": [str, True, True],
-            "path": [str, False, True],
-            "password": [str, False, True],
-            "compress": [bool, True, True]
-        }
         try:
-            _validate_attributes(data, specs)
+            _validate_attributes(data, _repo_conf_specs)
         except Exception as e:
             raise Exception(_(f"Invalid repo configuration '{self.config_file}': {str(e)}"))
         self._id=data["id"]
         datapath=data["path"]
         if not os.path.isabs(datapath):
-            if "INSECA_DEFAULT_REPOS_DIR" in os.environ:
-                datapath=f"{os.environ['INSECA_DEFAULT_REPOS_DIR']}/{datapath}"
+            repos_dir=os.environ.get("INSECA_DEFAULT_REPOS_DIR")
+            if repos_dir is not None:
+                datapath=f"{repos_dir}/{datapath}"
             else:
                 datapath=f"{self.global_conf.path}/{datapath}"
 
@@ -2450,16 +2627,28 @@ class RepoConfig(ConfigInterface):
         return self.borg_repo.archive_exists(archive_name)
 
     def mount(self, archive_name):
-        """Mounts the specified archive somewhere and returns the mount point"""
+        """Get a directory where the specified archive's contents can be accessed: its already extracted copy
+        in the archives cache if any, or otherwise the mount point where it is mounted (umount() does
+        nothing in the former case)"""
+        cdir=self.get_archive_dir_from_cache(archive_name)
+        if cdir is not None:
+            return cdir
         return self.borg_repo.mount(archive_name)
 
+    def iter_mounted_archives(self):
+        """Iterate over the names of the archives currently mounted (without accessing the repository)"""
+        if self._borg_repo is None: # otherwise no archive can have been mounted
+            return iter(())
+        return iter(self._borg_repo.mounted_archives)
+
     def umount(self, archive_name):
         """Unmounts the specified archive"""
         self.borg_repo.umount(archive_name)
 
     def umount_all(self):
         """Unmounts all the mounted archives"""
-        self.borg_repo.umount_all()
+        if self._borg_repo is not None: # otherwise no archive can have been mounted
+            self._borg_repo.umount_all()
 
     def extract_archive(self, archive_name, destdir):
         """Extract the whole contents of the specified archive in @destdir (which must already exist)"""
@@ -2493,11 +2682,12 @@ class RepoConfig(ConfigInterface):
 
             # remove old archives if any
             if os.path.exists(self.archives_cache_dir):
-                for fname in os.listdir(self.archives_cache_dir):
-                    path="%s/%s"%(self.archives_cache_dir, fname)
-                    if fname!=lastarname and os.path.isdir(path):
-                        shutil.rmtree(path, ignore_errors=True)
-                if len(os.listdir(self.archives_cache_dir))==1:
+                with os.scandir(self.archives_cache_dir) as it:
+                    entries=list(it)
+                old_dirs=[entry.path for entry in entries if entry.name!=lastarname and entry.is_dir(follow_symlinks=False)]
+                for path in old_dirs:
+                    shutil.rmtree(path, ignore_errors=True)
+                if len(entries)-len(old_dirs)==1:
                     if os.path.exists(shortcut):
                         os.remove(shortcut)
 
@@ -2559,12 +2749,13 @@ def init_root_config():
 
         # directories to store blobs per component providing the "base-os" feature
         script_dir=os.path.dirname(os.path.realpath(os.path.dirname(sys.argv[0])))
-        for component in os.listdir(f"{script_dir}/components"):
-            comp_conf=f"{script_dir}/components/{component}/config.json"
-            if os.path.exists(comp_conf):
-                cdata=json.load(open(comp_conf, "r"))
-                if "base-os" in cdata["provides"]:
-                    os.makedirs(f"{root}/blobs/{component}")
+        with os.scandir(f"{script_dir}/components") as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue # README.md, etc.
+                cdata=_load_component_conf(f"{entry.path}/config.json", missing_ok=True)
+                if cdata is not None and "base-os" in cdata["provides"]:
+                    os.makedirs(f"{root}/blobs/{entry.name}")
 
         # conf
         conf={"deploy": {
@@ -2573,27 +2764,38 @@ def init_root_config():
         }}
         util.write_data_to_file(json.dumps(conf, indent=4), "%s/inseca.json"%root)
 
+_gconf=None # object returned by get_gconf()
+_gconf_lock=threading.Lock() # serializes the creation of the object returned by get_gconf()
+
 def get_gconf(force_reload=False):
     """Get the last-created GlobalConfiguration object, and reload it if required
     If the configuration is not available or invalid, an exception will be raised."""
-    cache=None
-    if get_gconf._gconf:
-        if not force_reload:
-            return get_gconf._gconf
-        try:
-            cache=get_gconf._gconf.archives_cache_dir
-        except Exception:
-            pass
+    global _gconf
+    gconf=_gconf
+    if gconf is not None and not force_reload:
+        return gconf
+
+    with _gconf_lock:
+        cache=None
+        if _gconf:
+            if not force_reload:
+                return _gconf # created by another thread in the meantime
+            try:
+                cache=_gconf.archives_cache_dir
+            except Exception:
+                pass
+
+        # the new object is only published once fully set up, as it's returned without holding the lock
+        gconf=GlobalConfiguration()
+        if cache is None:
+            if not gconf.is_master:
+                repos_dir=os.environ.get("INSECA_DEFAULT_REPOS_DIR")
+                if repos_dir is None:
+                    raise Exception("INSECA_DEFAULT_REPOS_DIR environment variable is not defined")
+                gconf.archives_cache_dir=f"{repos_dir}/.archives-cache"
+        else:
+            gconf.archives_cache_dir=cache
 
-    get_gconf._gconf=GlobalConfiguration()
-    if cache is None:
-        if not get_gconf._gconf.is_master:
-            if not "INSECA_DEFAULT_REPOS_DIR" in os.environ:
-                raise Exception("INSECA_DEFAULT_REPOS_DIR environment variable is not defined")
-            get_gconf._gconf.archives_cache_dir="%s/.archives-cache"%os.environ["INSECA_DEFAULT_REPOS_DIR"]
-    else:
-        get_gconf._gconf.archives_cache_dir=cache
-
-    Sync.proxy_pac_file=get_gconf._gconf.proxy_pac_file
-    return get_gconf._gconf
-get_gconf._gconf=None
+        Sync.proxy_pac_file=gconf.proxy_pac_file
+        _gconf=gconf
+        return gconf
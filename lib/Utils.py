@@ -73,6 +73,8 @@ def exec_sync(args, stdin_data=None, as_bytes=False, exec_env=None, cwd=None, C_
     - if @C_locale is True, then the LANG environment variable is set to "C" (useful when parsing output which
       repends on the locale)
     - if @timeout is specified, then the sub process is killed after that number of seconds and the return code is 250
+    - if @args[0] is an absolute path (e.g. as returned by shutil.which()), the program is executed directly without
+      any PATH lookup
     """
     if debug:
         logmsg="==> "
@@ -136,7 +138,7 @@ def exec_sync(args, stdin_data=None, as_bytes=False, exec_env=None, cwd=None, C_
     return (retcode, sout, serr)
 
 def exec_async(args, exec_env=None):
-    """Run a command in the background
+    """Run a command in the background (as for exec_sync(), @args[0] should preferably be an absolute path)
     Returns: a subprocess.Popen object
     """
     import subprocess
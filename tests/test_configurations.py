@@ -0,0 +1,42 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path+=[os.path.dirname(os.path.realpath(__file__))+"/../lib"]
+
+import Configurations as confs
+
+class TestInitRootConfig(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir=tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self.script_dir=self._tmpdir.name
+        self.root=f"{self.script_dir}/root"
+
+        # components directory, as in the source tree
+        components_dir=f"{self.script_dir}/components"
+        for component, provides in (("base-os-test", ["base-os"]), ("other-test", [])):
+            os.makedirs(f"{components_dir}/{component}")
+            with open(f"{components_dir}/{component}/config.json", "w") as fd:
+                json.dump({"provides": provides}, fd)
+        os.makedirs(f"{components_dir}/no-config-test")
+        for fname in ("README.md", ".gitignore"):
+            with open(f"{components_dir}/{fname}", "w") as fd:
+                fd.write("not a component\n")
+
+    def _init_root_config(self):
+        # init_root_config() locates the components from the program's path (in the tools/ directory)
+        with mock.patch.object(sys, "argv", [f"{self.script_dir}/tools/inseca"]), \
+             mock.patch.dict(os.environ, {"INSECA_ROOT": self.root}):
+            confs.init_root_config()
+
+    def test_components_dir_with_plain_files(self):
+        self._init_root_config()
+        self.assertEqual(sorted(os.listdir(f"{self.root}/blobs")), ["base-os-test", "generic"])
+        self.assertTrue(os.path.isfile(f"{self.root}/inseca.json"))
+
+if __name__=="__main__":
+    unittest.main()